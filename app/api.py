@@ -1,5 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.config import settings
 from app.routers import calculations
 
 # FastAPI 애플리케이션 인스턴스 생성
@@ -7,19 +10,28 @@ app = FastAPI(
     title="OECD Pillar 2 계산 API",
     description="OECD Pillar 2 관련 세율 및 세액 계산을 위한 RESTful API",
     version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
+    # API 문서는 디버그 모드에서만 제공 (운영 환경에서는 OpenAPI 스키마 생성 생략)
+    docs_url="/docs" if settings.DEBUG else None,
+    redoc_url="/redoc" if settings.DEBUG else None,
+    openapi_url="/openapi.json" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse
 )
 
-# CORS 설정
+# CORS 설정 (배포 시 ALLOWED_ORIGINS 환경변수에 쉼표로 구분된 도메인 지정)
+# 모든 출처(*)를 허용할 때는 쿠키 등 자격 증명을 허용하지 않음 (임의의 출처가 자격 증명을 포함한 요청의 응답을 읽지 못하도록)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 실제 배포 시에는 특정 도메인으로 제한
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.ALLOWED_ORIGINS_LIST,
+    allow_credentials="*" not in settings.ALLOWED_ORIGINS_LIST,
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
+    expose_headers=["X-Cache"],  # 브라우저에서 응답 캐시 적중 여부를 읽을 수 있도록
+    max_age=86400,  # preflight 응답을 브라우저에서 24시간 캐시
 )
 
+# 응답 압축 설정 (1KB 이상의 응답만 gzip 압축)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # 라우터 등록
 app.include_router(calculations.router, prefix="/api", tags=["calculations"])
 
@@ -29,7 +41,7 @@ async def root():
     return {
         "message": "OECD Pillar 2 계산 API에 오신 것을 환영합니다!",
         "description": "유효세율, 소득포함비율, UTPR 계산 서비스를 제공합니다",
-        "docs": "/docs",
+        "docs": app.docs_url,
         "version": "1.0.0"
     }
 
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field
 from typing import Optional, List, Tuple
 from enum import Enum
 from decimal import Decimal
+from functools import cached_property
 
 
 # OECD Pillar2 관련 모델들
@@ -19,12 +20,17 @@ class ParentEntityType(str, Enum):
     PARTIALLY_OWNED_PARENT_ENTITY = "partially_owned_parent_entity"
     INTERMEDIATE_PARENT_ENTITY = "intermediate_parent_entity"
 
-class SafeharboursGroup(BaseModel):
+class ResponseModel(BaseModel):
+    """Base of the response models, shares the frozen response config"""
+    # 응답 전용 모델 설정 (불변, 기본값 재검증 및 추가 필드 처리 없음)
+    model_config = ConfigDict(frozen=True, extra="ignore", validate_default=False, populate_by_name=False, str_strip_whitespace=False)
+
+class SafeharboursGroup(ResponseModel):
     HASHCODE: str = Field(..., description="the hashcode of the safeharbours group, primary key")
     jurisdiction: str = Field(..., description="the jurisdiction that constitutes the basic unit of effective tax rate calculation")
     joint_venture_group_top_company_name: Optional[str] = Field(None, description="the name of the joint venture group top company")
 
-class EffectiveTaxRateCalculationGroup(BaseModel):
+class EffectiveTaxRateCalculationGroup(ResponseModel):
     HASHCODE: str = Field(..., description="the hashcode of the effective tax rate calculation group, primary key")
     jurisdiction: str = Field(..., description="the jurisdiction that constitutes the basic unit of effective tax rate calculation")
     is_stateless_entity_group: bool = Field(..., description="the stateless entity group")
@@ -59,17 +65,12 @@ class OwnershipsRequest(BaseModel):
     """Ownerships Information Request"""
     ownerships: List[OwnershipRequest] = Field(..., description="the list of ownerships")
 
-class OwnershipRequestItem(BaseModel):
-    """Ownership Information Request Item"""
-    owner_entity_index: int = Field(..., description="the index of the owner entity")
-    owned_entity_index: int = Field(..., description="the index of the owned entity")
-    ownership_percentage: float = Field(..., ge=0, le=1, description="the ownership percentage")
-
-class OwnershipsRequestDTO(BaseModel):
-    """Ownerships Information Request DTO"""
-    ownerships: List[OwnershipRequestItem] = Field(..., description="the list of ownerships")
+class PillarTwoCalculationStructureRequest(BaseModel):
+    """Pillar2 Calculation Structure Request"""
+    entities_request: EntitiesRequest = Field(..., description="the entities")
+    ownerships_request: OwnershipsRequest = Field(..., description="the ownerships")
 
-class CompanyResponse(BaseModel):
+class CompanyResponse(ResponseModel):
     """Pillar2 Calculation Structure Response for Company"""
     entity_name: str = Field(..., description="the name of the entity, primary key")
     parent_entity_type: Optional[ParentEntityType] = Field(None, description="the type of the parent entity, when it is not a parent entity, it is None")
@@ -78,35 +79,37 @@ class CompanyResponse(BaseModel):
     income_inclusion_rule_taxed_ratio: float = Field(default=0, ge=0, le=1, description="the taxed ratio of the income inclusion rule, when it is not taxed by IIR, it is 0")
     utpr_taxed_ratio: float = Field(default=0, ge=0, le=1, description="the taxed ratio of the undertaxed payments rule, when it is not taxed by UTPR, it is 0")
 
-class CompaniesResponse(BaseModel):
+class CompaniesResponse(ResponseModel):
     """Multiple Companies Information Response"""
     companies: List[CompanyResponse] = Field(..., description="the list of companies")
 
-class IncomeInclusionRuleResponse(BaseModel):
+class IncomeInclusionRuleResponse(ResponseModel):
     """Income Inclusion Rule Response"""
     parent_entity_name: str = Field(..., description="the name of the parent entity, primary key")
     owned_entity_names: List[str] = Field(..., description="the names of the owned entities")
     direct_indirect_ownership_ratio: float = Field(default=0, ge=0, le=1, description="the ratio of the direct and indirect ownership, when it is not owned by the parent entity, it is 0")
     income_inclusion_ratio: float = Field(default=0, ge=0, le=1, description="the ratio of the income inclusion, when it is not included by IIR, it is 0")
-    
-    @property
+
+    @computed_field(description="the direct and indirect ownership ratio minus the income inclusion ratio")
+    @cached_property
     def offset_ratio(self) -> float:
+        """Computed once on first access, and always derived from the two ratios however the model is constructed"""
         return self.direct_indirect_ownership_ratio - self.income_inclusion_ratio
     
-class IncomeInclusionRulesResponse(BaseModel):
+class IncomeInclusionRulesResponse(ResponseModel):
     """Multiple Income Inclusion Rules Information Response"""
     income_inclusion_rules: List[IncomeInclusionRuleResponse] = Field(..., description="the list of income inclusion rules")
 
-class UnderTaxedPaymentsRuleResponse(BaseModel):
+class UnderTaxedPaymentsRuleResponse(ResponseModel):
     """Under Taxed Payments Rule Response"""
     entity_name: str = Field(..., description="the name of the entity, primary key")
     utpr_taxed_ratio: float = Field(default=0, ge=0, le=1, description="the ratio of the undertaxed payments rule, when it is not taxed by UTPR, it is 0")
 
-class UnderTaxedPaymentsRulesResponse(BaseModel):
+class UnderTaxedPaymentsRulesResponse(ResponseModel):
     """Multiple Under Taxed Payments Rules Information Response"""
     under_taxed_payments_rules: List[UnderTaxedPaymentsRuleResponse] = Field(..., description="the list of under taxed payments rules")
 
-class OrgChartResponse(BaseModel):
+class OrgChartResponse(ResponseModel):
     """Org Chart Response"""
     entity_name: str = Field(..., description="the name of the entity, primary key")
     node_location: Tuple[int,int] = Field(..., description="the location of the node in the org chart, the first element is the level(top level is 0), the second element is the order in the level")
@@ -115,18 +118,18 @@ class OrgChartResponse(BaseModel):
     owner_names: Optional[List[str]] = Field(default=None, description="the names of the owners, when it doesn't have its owner, it is None")
     owned_names: Optional[List[str]] = Field(default=None, description="the names of the owned entities, when it doesn't have its owned entity, it is None")
 
-class OrgChartsResponse(BaseModel):
+class OrgChartsResponse(ResponseModel):
     """Multiple Org Charts Information Response"""
     org_charts: List[OrgChartResponse] = Field(..., description="the list of org charts")
 
-class StructuresResponse(BaseModel):
+class StructuresResponse(ResponseModel):
     """Structure of Pillar 2 Calculation"""
     companies: CompaniesResponse = Field(..., description="the companies")
     income_inclusion_rules: IncomeInclusionRulesResponse = Field(..., description="the income inclusion rules")
     under_taxed_payments_rules: UnderTaxedPaymentsRulesResponse = Field(..., description="the under taxed payments rules")
     org_charts: OrgChartsResponse = Field(..., description="the org charts")
 
-class ApiResponse(BaseModel):
+class ApiResponse(ResponseModel):
     """API 응답 기본 모델"""
     success: bool = Field(default=True, description="성공 여부")
     message: str = Field(default="계산이 성공적으로 완료되었습니다", description="응답 메시지")
@@ -141,6 +144,17 @@ class EntitiesIndexMappingDTO(BaseModel):
     """Entities Index Mapping DTO"""
     entities_index_mapping_items: List[EntitiesIndexMappingItem] = Field(..., description="the list of the entities index mapping items")
 
+    # 이름 ↔ 번호 조회용 딕셔너리 (처음 접근할 때 한 번만 만들어 DTO에 저장)
+    @cached_property
+    def name_to_number(self) -> dict:
+        """Entity name to entity number"""
+        return {item.entity_name: item.entity_number for item in self.entities_index_mapping_items}
+
+    @cached_property
+    def number_to_name(self) -> dict:
+        """Entity number to entity name"""
+        return {item.entity_number: item.entity_name for item in self.entities_index_mapping_items}
+
 class EntitySimpleRequest(BaseModel):
     """Entity Simple Request"""
     name: str = Field(..., description="the name of the entity, primary key")
@@ -149,13 +163,35 @@ class EntitiesSimpleRequest(BaseModel):
     """Entities Simple Request"""
     entities: List[EntitySimpleRequest] = Field(..., description="the list of the entities")
 
-class DirectIndirectOwnershipRatioResponseItem(BaseModel):
+class DirectIndirectOwnershipRatioResponseItem(ResponseModel):
     """Direct and Indirect Ownership Ratio Item"""
     owner_entity_name: str = Field(..., description="the name of the owner entity")
     owned_entity_name: str = Field(..., description="the name of the owned entity")
     direct_indirect_ownership_ratio: float = Field(..., description="the direct and indirect ownership ratio, when it is not owned by the owner entity, it is 0") # 직간접 지분이 존재하는 관계만 반환
 
-class DirectIndirectOwnershipRatioResponse(BaseModel):
+class DirectIndirectOwnershipRatioResponse(ResponseModel):
     """Direct and Indirect Ownership Ratio DTO, the list of the direct and indirect ownership ratio items"""
     direct_indirect_ownership_ratio_items: List[DirectIndirectOwnershipRatioResponseItem] = Field(..., description="the list of the direct and indirect ownership ratio items")
-    iterations: int = Field(..., description="the number of iterations")
\ No newline at end of file
+    iterations: int = Field(..., description="the number of iterations")
+
+class DirectIndirectOwnershipRatiosResponse(ResponseModel):
+    """Multiple Direct and Indirect Ownership Ratios Response, one per ownership group in the request order"""
+    direct_indirect_ownership_ratios: List[DirectIndirectOwnershipRatioResponse] = Field(..., description="the list of the direct and indirect ownership ratios")
+
+# 엔드포인트별 응답 모델 (라우트의 response_model로 OpenAPI 문서에 실제 data 구조를 표시)
+class StructuresApiResponse(ApiResponse):
+    """API Response of the Pillar 2 Calculation Structure"""
+    data: Optional[StructuresResponse] = Field(None, description="the structure of pillar 2 calculation")
+
+class DirectIndirectOwnershipRatioApiResponse(ApiResponse):
+    """API Response of the Direct and Indirect Ownership Ratio"""
+    data: Optional[DirectIndirectOwnershipRatioResponse] = Field(None, description="the direct and indirect ownership ratio")
+
+class DirectIndirectOwnershipRatiosApiResponse(ApiResponse):
+    """API Response of the Direct and Indirect Ownership Ratios of multiple ownership groups"""
+    data: Optional[DirectIndirectOwnershipRatiosResponse] = Field(None, description="the direct and indirect ownership ratios, one per ownership group")
+
+# 요청 본문 검증용 TypeAdapter (프로세스당 한 번만 스키마 생성)
+OWNERSHIPS_ADAPTER = TypeAdapter(OwnershipsRequest)
+OWNERSHIPS_BATCH_ADAPTER = TypeAdapter(List[OwnershipsRequest])
+PILLAR_TWO_CALCULATION_STRUCTURE_ADAPTER = TypeAdapter(PillarTwoCalculationStructureRequest)
@@ -10,7 +10,19 @@ class Settings:
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     
+    # Uvicorn 설정 (auto는 uvloop/httptools가 설치되어 있으면 사용)
+    # 계산 엔드포인트는 CPU 바운드이므로 기본 worker 수는 코어 수 - 1 (최소 1)
+    UVICORN_WORKERS: int = int(os.getenv("UVICORN_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    UVICORN_LOOP: str = os.getenv("UVICORN_LOOP", "auto")
+    UVICORN_HTTP: str = os.getenv("UVICORN_HTTP", "auto")
+    
+    # 응답 캐시 설정 (0이면 캐시 사용 안 함)
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 캐시 전체 최대 크기 (기본 64MB)
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(4 * 1024 * 1024)))  # 이보다 큰 응답은 캐시하지 않음 (기본 4MB)
+    
     # CORS 설정
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "*")
+    ALLOWED_ORIGINS_LIST: list = [origin.strip() for origin in ALLOWED_ORIGINS.split(",") if origin.strip()]
 
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,103 @@
+import msgspec
+from typing import Optional, List, Tuple, Any
+from app.basic_structure_model import ParentEntityType
+
+
+# basic_structure_model 응답 모델과 동일한 JSON 구조를 갖는 msgspec Struct
+# 응답 직렬화에 사용하며, pydantic 모델은 라우트의 response_model로 OpenAPI 응답 스키마 문서화에만 사용
+# 요청당 대량으로 생성되는 말단 레코드는 순환 참조가 없으므로 gc=False로 GC 추적 대상에서 제외
+
+class CompanyStruct(msgspec.Struct, frozen=True, gc=False):
+    """Pillar2 Calculation Structure Response for Company, mirrors CompanyResponse"""
+    entity_name: str
+    parent_entity_type: Optional[ParentEntityType] = None
+    safeharbours_group: Optional[str] = None
+    effective_tax_rate_calculation_group: Optional[str] = None
+    income_inclusion_rule_taxed_ratio: float = 0
+    utpr_taxed_ratio: float = 0
+
+class CompaniesStruct(msgspec.Struct, frozen=True):
+    """Multiple Companies Information Response, mirrors CompaniesResponse"""
+    companies: List[CompanyStruct]
+
+class IncomeInclusionRuleStruct(msgspec.Struct, frozen=True, gc=False, kw_only=True):
+    """Income Inclusion Rule Response, mirrors IncomeInclusionRuleResponse"""
+    parent_entity_name: str
+    owned_entity_names: List[str]
+    direct_indirect_ownership_ratio: float = 0
+    income_inclusion_ratio: float = 0
+    # direct_indirect_ownership_ratio - income_inclusion_ratio, create로 생성하면 자동 계산됨
+    offset_ratio: float
+
+    def __post_init__(self):
+        # 직접 생성할 때 두 비율과 맞지 않는 offset_ratio가 직렬화되지 않도록 막음
+        if self.offset_ratio != self.direct_indirect_ownership_ratio - self.income_inclusion_ratio:
+            raise ValueError("offset_ratio must be direct_indirect_ownership_ratio - income_inclusion_ratio")
+
+    @classmethod
+    def create(cls, parent_entity_name: str, owned_entity_names: List[str], direct_indirect_ownership_ratio: float = 0, income_inclusion_ratio: float = 0) -> "IncomeInclusionRuleStruct":
+        """Build the struct with offset_ratio derived from the two ratios"""
+        return cls(
+            parent_entity_name=parent_entity_name,
+            owned_entity_names=owned_entity_names,
+            direct_indirect_ownership_ratio=direct_indirect_ownership_ratio,
+            income_inclusion_ratio=income_inclusion_ratio,
+            offset_ratio=direct_indirect_ownership_ratio - income_inclusion_ratio
+        )
+
+class IncomeInclusionRulesStruct(msgspec.Struct, frozen=True):
+    """Multiple Income Inclusion Rules Information Response, mirrors IncomeInclusionRulesResponse"""
+    income_inclusion_rules: List[IncomeInclusionRuleStruct]
+
+class UnderTaxedPaymentsRuleStruct(msgspec.Struct, frozen=True, gc=False):
+    """Under Taxed Payments Rule Response, mirrors UnderTaxedPaymentsRuleResponse"""
+    entity_name: str
+    utpr_taxed_ratio: float = 0
+
+class UnderTaxedPaymentsRulesStruct(msgspec.Struct, frozen=True):
+    """Multiple Under Taxed Payments Rules Information Response, mirrors UnderTaxedPaymentsRulesResponse"""
+    under_taxed_payments_rules: List[UnderTaxedPaymentsRuleStruct]
+
+class OrgChartStruct(msgspec.Struct, frozen=True, gc=False):
+    """Org Chart Response, mirrors OrgChartResponse"""
+    entity_name: str
+    node_location: Tuple[int, int]
+    edge_percentage: Optional[float] = None
+    parent_entity_name: Optional[str] = None
+    owner_names: Optional[List[str]] = None
+    owned_names: Optional[List[str]] = None
+
+class OrgChartsStruct(msgspec.Struct, frozen=True):
+    """Multiple Org Charts Information Response, mirrors OrgChartsResponse"""
+    org_charts: List[OrgChartStruct]
+
+class StructuresStruct(msgspec.Struct, frozen=True):
+    """Structure of Pillar 2 Calculation, mirrors StructuresResponse"""
+    companies: CompaniesStruct
+    income_inclusion_rules: IncomeInclusionRulesStruct
+    under_taxed_payments_rules: UnderTaxedPaymentsRulesStruct
+    org_charts: OrgChartsStruct
+
+class DirectIndirectOwnershipRatioItemStruct(msgspec.Struct, frozen=True, gc=False):
+    """Direct and Indirect Ownership Ratio Item, mirrors DirectIndirectOwnershipRatioResponseItem"""
+    owner_entity_name: str
+    owned_entity_name: str
+    direct_indirect_ownership_ratio: float
+
+class DirectIndirectOwnershipRatioStruct(msgspec.Struct, frozen=True):
+    """Direct and Indirect Ownership Ratio, mirrors DirectIndirectOwnershipRatioResponse"""
+    direct_indirect_ownership_ratio_items: List[DirectIndirectOwnershipRatioItemStruct]
+    iterations: int
+
+class DirectIndirectOwnershipRatiosStruct(msgspec.Struct, frozen=True):
+    """Multiple Direct and Indirect Ownership Ratios, mirrors DirectIndirectOwnershipRatiosResponse"""
+    direct_indirect_ownership_ratios: List[DirectIndirectOwnershipRatioStruct]
+
+class ApiResponseStruct(msgspec.Struct, frozen=True):
+    """API 응답 기본 구조, mirrors ApiResponse"""
+    success: bool = True
+    message: str = "계산이 성공적으로 완료되었습니다"
+    data: Any = None
+
+# 응답 직렬화용 인코더 (프로세스당 하나)
+JSON_ENCODER = msgspec.json.Encoder()
@@ -1,12 +1,45 @@
-from decimal import Decimal, ROUND_HALF_UP, getcontext
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from decimal import Decimal, Context, ROUND_HALF_UP, getcontext
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Tuple
 from enum import Enum
+import numpy as np
 
 # 정밀도 설정
 DECIMAL_PLACES = 10  # 소수점 10자리까지
 getcontext().prec = 28  # 높은 정밀도 설정
 
+# 반복 사용되는 Decimal 상수 (호출마다 문자열 파싱하지 않도록 모듈 로드 시 한 번만 생성)
+_QUANT = Decimal(1).scaleb(-DECIMAL_PLACES)  # 반올림 단위 (0.0000000001)
+_ZERO = Decimal(0)
+DEFAULT_MIN_TAX_RATE = Decimal('0.15')  # 최소세율 기본값 15%
+_CTX = Context(prec=28, rounding=ROUND_HALF_UP)  # 검증용 고정 컨텍스트 (호출마다 getcontext() 조회하지 않음)
+
+def _quantize_decimal(v):
+    """Decimal 값을 지정된 자릿수로 반올림 (이미 반올림된 Decimal은 그대로 반환)"""
+    if isinstance(v, Decimal):
+        if v.as_tuple().exponent == -DECIMAL_PLACES:
+            return v
+        value = v
+    elif isinstance(v, float):
+        # float는 이진 근사값이 아닌 입력된 십진 표기(repr) 기준으로 반올림
+        value = repr(v)
+    elif isinstance(v, (int, str)) and not isinstance(v, bool):
+        # int, str은 문자열 변환 없이 바로 Decimal 생성
+        value = v
+    else:
+        # 숫자가 아닌 값은 pydantic의 Decimal 검증에서 오류로 처리
+        return v
+    try:
+        value = Decimal(value)
+    except ArithmeticError:
+        # 숫자로 변환할 수 없는 문자열도 pydantic의 Decimal 검증에서 오류로 처리
+        return v
+    try:
+        return value.quantize(_QUANT, context=_CTX)
+    except ArithmeticError:
+        # 정밀도(28자리) 안에서 소수점 DECIMAL_PLACES자리로 표현할 수 없는 값은 반올림 없이 통과시키지 않음
+        raise ValueError(f"유효숫자 {_CTX.prec}자리 안에서 소수점 {DECIMAL_PLACES}자리로 표현할 수 없는 값입니다")
+
 class EntityType(str, Enum):
     """법인 유형"""
     PARENT = "parent"
@@ -24,12 +57,11 @@ class PreciseEntity(BaseModel):
     tax_paid: Decimal = Field(..., ge=0, description="납부한 세금")
     employees: int = Field(..., ge=0, description="직원 수")
     
-    @validator('revenue', 'profit', 'tax_paid')
+    @field_validator('revenue', 'profit', 'tax_paid', mode='before')
+    @classmethod
     def round_decimal_values(cls, v):
         """Decimal 값을 지정된 자릿수로 반올림"""
-        if isinstance(v, Decimal):
-            return v.quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP)
-        return Decimal(str(v)).quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP)
+        return _quantize_decimal(v)
 
 class HighPrecisionEntity(BaseModel):
     """최고 정밀도 계산을 위한 법인 정보 (Decimal 사용)"""
@@ -41,18 +73,17 @@ class HighPrecisionEntity(BaseModel):
     tax_paid: Decimal = Field(..., ge=0, description="납부한 세금 (최고 정밀도)")
     employees: int = Field(..., ge=0, description="직원 수")
     
-    @validator('revenue', 'profit', 'tax_paid')
+    @field_validator('revenue', 'profit', 'tax_paid', mode='before')
+    @classmethod
     def round_decimal_values(cls, v):
         """Decimal 값을 지정된 자릿수로 반올림"""
-        if isinstance(v, Decimal):
-            return v.quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP)
-        return Decimal(str(v)).quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP)
+        return _quantize_decimal(v)
 
 # 요청/응답 모델들 (Decimal 기반)
 class PreciseEffectiveTaxRateRequest(BaseModel):
     """정교한 유효세율 계산 요청"""
     entities: List[PreciseEntity] = Field(..., description="법인 목록")
-    minimum_tax_rate: Decimal = Field(default=Decimal('0.15'), ge=0, le=1, description="최소세율 (기본값: 15%)")
+    minimum_tax_rate: Decimal = Field(default=DEFAULT_MIN_TAX_RATE, ge=0, le=1, description="최소세율 (기본값: 15%)")
 
 class PreciseEffectiveTaxRateResponse(BaseModel):
     """정교한 유효세율 계산 응답"""
@@ -80,9 +111,9 @@ class PrecisionCalculator:
     def calculate_effective_tax_rate_decimal(entity: PreciseEntity) -> Decimal:
         """Decimal을 사용한 유효세율 계산"""
         if entity.profit <= 0:
-            return Decimal('0')
+            return _ZERO
         return (entity.tax_paid / entity.profit).quantize(
-            Decimal('0.' + '0' * DECIMAL_PLACES), 
+            _QUANT, 
             rounding=ROUND_HALF_UP
         )
     
@@ -90,9 +121,9 @@ class PrecisionCalculator:
     def calculate_effective_tax_rate_high_precision(entity: HighPrecisionEntity) -> Decimal:
         """최고 정밀도 Decimal을 사용한 유효세율 계산"""
         if entity.profit <= 0:
-            return Decimal('0')
+            return _ZERO
         return (entity.tax_paid / entity.profit).quantize(
-            Decimal('0.' + '0' * DECIMAL_PLACES), 
+            _QUANT, 
             rounding=ROUND_HALF_UP
         )
     
@@ -100,25 +131,49 @@ class PrecisionCalculator:
     def calculate_additional_tax_decimal(entity: PreciseEntity, minimum_rate: Decimal) -> Decimal:
         """Decimal을 사용한 추가 납부 세금 계산"""
         if entity.profit <= 0:
-            return Decimal('0')
+            return _ZERO
         
         effective_rate = PrecisionCalculator.calculate_effective_tax_rate_decimal(entity)
         if effective_rate >= minimum_rate:
-            return Decimal('0')
+            return _ZERO
         
         required_tax = entity.profit * minimum_rate
         additional_tax = required_tax - entity.tax_paid
-        return max(Decimal('0'), additional_tax).quantize(
-            Decimal('0.' + '0' * DECIMAL_PLACES), 
+        return max(_ZERO, additional_tax).quantize(
+            _QUANT, 
             rounding=ROUND_HALF_UP
         )
     
+    @staticmethod
+    def calculate_batch(entities: List[PreciseEntity], minimum_rate: Decimal) -> Tuple[np.ndarray, np.ndarray]:
+        """float64 벡터 연산으로 여러 법인의 유효세율과 추가 납부 세금을 한 번에 계산
+
+        결과는 calculate_effective_tax_rate_decimal, calculate_additional_tax_decimal과 같은 규칙을 따르며,
+        보고용 정밀 값이 필요하면 to_quantized_decimals로 변환
+        """
+        profits = np.array([float(entity.profit) for entity in entities], dtype=np.float64)
+        taxes = np.array([float(entity.tax_paid) for entity in entities], dtype=np.float64)
+        minimum_rate = float(minimum_rate)
+
+        has_profit = profits > 0
+        effective_tax_rates = np.divide(taxes, profits, out=np.zeros_like(profits), where=has_profit)
+        # Decimal 경로와 같이 소수점 DECIMAL_PLACES자리로 반올림한 유효세율을 최소세율과 비교 (반올림 전 값으로 비교하면 경계에서 결과가 달라짐)
+        effective_tax_rates = np.round(effective_tax_rates, DECIMAL_PLACES)
+        # 이익이 있고 유효세율이 최소세율 미만인 경우에만 추가 납부
+        additional_taxes = np.where(has_profit & (effective_tax_rates < minimum_rate), np.maximum(0.0, profits * minimum_rate - taxes), 0.0)
+        return effective_tax_rates, additional_taxes
+
+    @staticmethod
+    def to_quantized_decimals(values: np.ndarray) -> List[Decimal]:
+        """float64 계산 결과를 지정된 자릿수의 Decimal로 변환 (보고 단계에서 사용)"""
+        return [Decimal(value).quantize(_QUANT, rounding=ROUND_HALF_UP) for value in values.tolist()]
+
     @staticmethod
     def calculate_ownership_ratio(direct_ownership: Decimal, indirect_ownership: Decimal) -> Decimal:
         """직간접 지분 비율 계산"""
         total_ownership = direct_ownership + indirect_ownership
         return total_ownership.quantize(
-            Decimal('0.' + '0' * DECIMAL_PLACES), 
+            _QUANT, 
             rounding=ROUND_HALF_UP
         )
 
@@ -129,9 +184,8 @@ class PrecisionComparison(BaseModel):
     value_decimal: Decimal = Field(..., description="Decimal (정확)")
     value_high_precision: Decimal = Field(..., description="고정밀 Decimal (최고 정밀도)")
     
-    @validator('value_decimal', 'value_high_precision')
+    @field_validator('value_decimal', 'value_high_precision', mode='before')
+    @classmethod
     def round_decimal_values(cls, v):
         """Decimal 값을 지정된 자릿수로 반올림"""
-        if isinstance(v, Decimal):
-            return v.quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP)
-        return Decimal(str(v)).quantize(Decimal('0.' + '0' * DECIMAL_PLACES), rounding=ROUND_HALF_UP) 
\ No newline at end of file
+        return _quantize_decimal(v) 
\ No newline at end of file
@@ -0,0 +1,52 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+import orjson
+from app.config import settings
+
+
+class ResponseCache:
+    """In-process LRU cache of serialized responses, keyed by the hash of the canonical request body
+
+    The calculations are pure functions of the request body, so a hit returns the already-encoded response bytes.
+    The cache is bounded both by the number of entries and by the total size of the cached responses.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int, max_entry_bytes: int):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+
+    @staticmethod
+    def make_key(path: str, body: bytes) -> Optional[bytes]:
+        """Hash the path and the key-sorted JSON body, None when the body is not valid JSON"""
+        try:
+            canonical_body = orjson.dumps(orjson.loads(body), option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONDecodeError:
+            return None
+        return hashlib.blake2b(path.encode() + b"\0" + canonical_body, digest_size=16).digest()
+
+    def get(self, key: Optional[bytes]) -> Optional[bytes]:
+        """Return the cached response content and mark it as recently used"""
+        if key is None or key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: Optional[bytes], content: bytes) -> None:
+        """Store the response content, evicting the least recently used entries when full"""
+        # 큰 응답(N^2 지분 비율 등)은 다른 항목들을 모두 밀어내지 않도록 캐시하지 않음
+        if key is None or self.maxsize <= 0 or len(content) > min(self.max_entry_bytes, self.max_bytes):
+            return
+        if key in self._entries:
+            self.current_bytes -= len(self._entries[key])
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        self.current_bytes += len(content)
+        while len(self._entries) > self.maxsize or self.current_bytes > self.max_bytes:
+            _, evicted_content = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted_content)
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_MAX_ENTRY_BYTES)
@@ -1,27 +1,95 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import sys
+from functools import lru_cache
 import numpy as np
-from app.basic_structure_model import (ApiResponse,
-    CompanyResponse, OwnershipRequest, OwnershipsRequest, EntityRequest, EntitiesRequest,
-    IncomeInclusionRuleResponse, UnderTaxedPaymentsRuleResponse,
-    OrgChartResponse,
-    SafeharboursGroup, EffectiveTaxRateCalculationGroup,
+import numba
+from numba import njit, prange
+from scipy import linalg, sparse
+from scipy.sparse.linalg import splu
+from app.basic_structure_model import (StructuresApiResponse,
+    DirectIndirectOwnershipRatioApiResponse,
+    DirectIndirectOwnershipRatiosApiResponse,
+    OwnershipsRequest, EntitiesRequest,
     EntitiesIndexMappingDTO, EntitiesIndexMappingItem,
-    EntitySimpleRequest, EntitiesSimpleRequest,
-    DirectIndirectOwnershipRatioResponse,
-    DirectIndirectOwnershipRatioResponseItem,
     UltimateParentEntityAccountingType,
-    CompaniesResponse,
-    StructuresResponse,
-    IncomeInclusionRulesResponse,
-    UnderTaxedPaymentsRulesResponse,
-    OrgChartsResponse,
-    OwnershipsRequestDTO,
-    OwnershipRequestItem
+    PillarTwoCalculationStructureRequest,
+    OWNERSHIPS_ADAPTER,
+    OWNERSHIPS_BATCH_ADAPTER,
+    PILLAR_TWO_CALCULATION_STRUCTURE_ADAPTER
 )
+from app.fast_models import (ApiResponseStruct,
+    CompaniesStruct, IncomeInclusionRulesStruct, UnderTaxedPaymentsRulesStruct, OrgChartsStruct,
+    StructuresStruct,
+    DirectIndirectOwnershipRatioStruct,
+    DirectIndirectOwnershipRatioItemStruct,
+    DirectIndirectOwnershipRatiosStruct,
+    JSON_ENCODER
+)
+from app.response_cache import response_cache
+from app.config import settings
 
 router = APIRouter()
 
+# parallel=True 커널은 이벤트 루프와 asyncio.to_thread 스레드에서 동시에 호출될 수 있으므로 스레드 안전한 레이어(TBB 또는 OpenMP)만 사용
+# (workqueue 레이어는 동시 호출 시 프로세스를 종료함)
+numba.config.THREADING_LAYER = "threadsafe"
+
+# 이 크기 이상이고 지분 관계 밀도가 이 값 이하인 행렬은 희소 LU 분해로 계산
+SPARSE_MIN_MATRIX_SIZE = 500
+SPARSE_MAX_DENSITY = 0.05
+
+# 이 크기 이하의 행렬은 LAPACK 호출 오버헤드가 계산보다 크므로 JIT 커널에서 직접 역행렬을 구함
+SMALL_MATRIX_MAX_SIZE = 32
+
+# 소유 관계 레코드 배열 타입 (owner 번호, owned 번호, 지분율)
+OWNERSHIP_DTYPE = np.dtype([("owner_entity_index", np.int32), ("owned_entity_index", np.int32), ("ownership_percentage", np.float64)])
+
+# 회계 처리 유형별 번호 부여 우선순위 (최상위 모회사 → 연결 → 지분법 → 기타)
+ACCOUNTING_TYPE_ORDER = {
+    UltimateParentEntityAccountingType.ULTIMATE_PARENT_ENTITY: 0,
+    UltimateParentEntityAccountingType.CONSOLIDATED: 1,
+    UltimateParentEntityAccountingType.EQUITY_METHOD: 2,
+    UltimateParentEntityAccountingType.ETC: 3,
+}
+
+# 직간접 지분 계산 임계값
+EPSILON_FOR_CALCULATION = 1e-7  # float 정밀도를 고려한 안전한 임계값
+EPSILON_FOR_FILTERING = 1e-4  # 결과 필터링을 위한 임계값
+RATIO_DECIMAL_PLACES = 4  # 소수점 자릿수
+
+# 이 개수 이상의 소유 관계는 행렬 계산을 스레드에서 수행 (작은 계산은 이벤트 루프에서 바로 처리)
+THREAD_OFFLOAD_MIN_OWNERSHIPS = 256
+
+def request_body_openapi(adapter: TypeAdapter) -> Optional[dict]:
+    """OpenAPI request body for the handlers which validate the raw body with the adapter, None when the docs are disabled"""
+    if not settings.DEBUG:
+        return None
+    schema = adapter.json_schema()
+    definitions = schema.pop("$defs", {})
+
+    # $defs 참조를 펼쳐서 OpenAPI components 없이도 문서화되도록 함
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(definitions[node["$ref"].split("/")[-1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
+
+def parse_request_body(body: bytes, adapter: TypeAdapter):
+    """Validate the raw request body with the prebuilt adapter, the errors are returned as 422 like FastAPI"""
+    try:
+        return adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
+
 def create_entities_simple_index_mapping_dto(ownerships_request: OwnershipsRequest) -> EntitiesIndexMappingDTO:
     """Create the entities index mapping dto for simple entities"""
     # OwnershipsRequest에서 owner, owned 엔티티들을 unique하게 추출
@@ -32,185 +100,375 @@ def create_entities_simple_index_mapping_dto(ownerships_request: OwnershipsReque
         unique_entities.add(ownership.owner_entity_name)
         unique_entities.add(ownership.owned_entity_name)
     
-    # unique 엔티티들을 리스트로 변환하고 정렬
-    entities_list = sorted(list(unique_entities))
+    # unique 엔티티들을 intern하여 리스트로 변환하고 정렬 (응답 레코드들이 같은 문자열 객체를 공유)
+    entities_list = sorted(sys.intern(entity_name) for entity_name in unique_entities)
     
-    # index mapping 생성
+    # index mapping 생성 (내부에서 만든 값이므로 검증 없이 생성)
     entities_index_mapping_items = []
     for index, entity_name in enumerate(entities_list):
         entities_index_mapping_items.append(
-            EntitiesIndexMappingItem(entity_name=entity_name, entity_number=index)
+            EntitiesIndexMappingItem.model_construct(entity_name=entity_name, entity_number=index)
         )
     
-    return EntitiesIndexMappingDTO(entities_index_mapping_items=entities_index_mapping_items)
+    return EntitiesIndexMappingDTO.model_construct(entities_index_mapping_items=entities_index_mapping_items)
+
+@lru_cache(maxsize=128)
+def create_entities_index_mapping_dto_cached(entity_keys: Tuple[Tuple[str, UltimateParentEntityAccountingType], ...]) -> EntitiesIndexMappingDTO:
+    """Create the entities index mapping dto from (name, accounting type) pairs, memoized for repeated entity rosters
+
+    The returned dto is shared between requests and must not be modified.
+    """
+    # 우선순위에 따라 한 번에 정렬 (안정 정렬이므로 같은 유형 안에서는 요청 순서 유지)
+    sorted_entity_keys = sorted(entity_keys, key=lambda entity_key: ACCOUNTING_TYPE_ORDER[entity_key[1]])
+
+    # 정렬 순서대로 번호 부여 (엔티티 이름은 intern하여 응답 레코드들이 같은 문자열 객체를 공유, 내부에서 만든 값이므로 검증 없이 생성)
+    entities_index_mapping_items = [
+        EntitiesIndexMappingItem.model_construct(entity_name=sys.intern(entity_name), entity_number=index)
+        for index, (entity_name, _) in enumerate(sorted_entity_keys)
+    ]
+
+    return EntitiesIndexMappingDTO.model_construct(entities_index_mapping_items=entities_index_mapping_items)
 
 def create_entities_index_mapping_dto(entities_request: EntitiesRequest) -> EntitiesIndexMappingDTO:
     """Create the entities index mapping dto with priority-based numbering"""
-    
-    # 엔티티를 타입별로 분류
-    ultimate_parent_entities = []
-    consolidated_entities = []
-    equity_method_entities = []
-    etc_entities = []
-    
-    for entity in entities_request.entities:
-        accounting_type = entity.ultimate_parent_entity_accounting_type
-        if accounting_type == UltimateParentEntityAccountingType.ULTIMATE_PARENT_ENTITY:
-            ultimate_parent_entities.append(entity)
-        elif accounting_type == UltimateParentEntityAccountingType.CONSOLIDATED:
-            consolidated_entities.append(entity)
-        elif accounting_type == UltimateParentEntityAccountingType.EQUITY_METHOD:
-            equity_method_entities.append(entity)
-        else:  # ETC
-            etc_entities.append(entity)
-    
-    # 우선순위에 따라 번호 부여
-    entities_index_mapping_items = []
-    current_number = 0
-    
-    # 1. Ultimate Parent Entity: 0번
-    for entity in ultimate_parent_entities:
-        entities_index_mapping_items.append(
-            EntitiesIndexMappingItem(entity_name=entity.name, entity_number=current_number)
-        )
-        current_number += 1
-    
-    # 2. Consolidation: 1번부터
-    for entity in consolidated_entities:
-        entities_index_mapping_items.append(
-            EntitiesIndexMappingItem(entity_name=entity.name, entity_number=current_number)
-        )
-        current_number += 1
-    
-    # 3. Equity Method: Consolidation 다음부터
-    for entity in equity_method_entities:
-        entities_index_mapping_items.append(
-            EntitiesIndexMappingItem(entity_name=entity.name, entity_number=current_number)
-        )
-        current_number += 1
-    
-    # 4. ETC: 그 다음부터
-    for entity in etc_entities:
-        entities_index_mapping_items.append(
-            EntitiesIndexMappingItem(entity_name=entity.name, entity_number=current_number)
-        )
-        current_number += 1
-    
-    return EntitiesIndexMappingDTO(entities_index_mapping_items=entities_index_mapping_items)
+    entity_keys = tuple((entity.name, entity.ultimate_parent_entity_accounting_type) for entity in entities_request.entities)
+    return create_entities_index_mapping_dto_cached(entity_keys)
 
-def convert_ownerships_to_dto(entities_index_mapping_dto: EntitiesIndexMappingDTO, ownerships_request: OwnershipsRequest) -> OwnershipsRequestDTO:
-    """Convert OwnershipsRequest to OwnershipsRequestDTO using entity index mapping"""
-    
-    # 엔티티 이름을 번호로 매핑하는 딕셔너리 생성
-    entity_name_to_number = {entity.entity_name: entity.entity_number for entity in entities_index_mapping_dto.entities_index_mapping_items}
+def convert_ownerships_to_array(entities_index_mapping_dto: EntitiesIndexMappingDTO, ownerships_request: OwnershipsRequest) -> np.ndarray:
+    """Convert OwnershipsRequest to a structured array of OWNERSHIP_DTYPE using entity index mapping"""
     
-    # ownerships를 변환
-    ownership_items = []
-    for ownership in ownerships_request.ownerships:
-        owner_entity_index = entity_name_to_number[ownership.owner_entity_name]
-        owned_entity_index = entity_name_to_number[ownership.owned_entity_name]
-        
-        ownership_items.append(OwnershipRequestItem(
-            owner_entity_index=owner_entity_index,
-            owned_entity_index=owned_entity_index,
-            ownership_percentage=ownership.ownership_percentage
-        ))
+    # 엔티티 이름을 번호로 매핑하는 딕셔너리 (DTO에 한 번만 만들어 재사용)
+    entity_name_to_number = entities_index_mapping_dto.name_to_number
     
-    return OwnershipsRequestDTO(ownerships=ownership_items)
+    # ownerships를 (owner 번호, owned 번호, 지분율) 레코드 배열로 변환
+    return np.fromiter(
+        ((entity_name_to_number[ownership.owner_entity_name], entity_name_to_number[ownership.owned_entity_name], ownership.ownership_percentage)
+         for ownership in ownerships_request.ownerships),
+        dtype=OWNERSHIP_DTYPE,
+        count=len(ownerships_request.ownerships)
+    )
 
-def calculate_direct_indirect_ownership_ratio_core(entities_index_mapping_dto: EntitiesIndexMappingDTO, ownerships_request: OwnershipsRequestDTO) -> DirectIndirectOwnershipRatioResponse:
-    """Calculate the direct and indirect ownership ratio"""
+def create_simple_ownership_group(ownerships_request: OwnershipsRequest) -> Tuple[EntitiesIndexMappingDTO, np.ndarray]:
+    """Create the entities index mapping dto and the ownership records of one ownership group"""
+    entities_index_mapping_dto = create_entities_simple_index_mapping_dto(ownerships_request)
+    return entities_index_mapping_dto, convert_ownerships_to_array(entities_index_mapping_dto, ownerships_request)
 
-    epsilon_for_calculation = 1e-7  # float 정밀도를 고려한 안전한 임계값
-    epsilon_for_filtering = 1e-4  # 결과 필터링을 위한 임계값
-    decimal_places = 4  # 소수점 자릿수
-    
-    # 엔티티 인덱스를 이름으로 매핑하는 딕셔너리 생성 (결과에서 이름 표시를 위해)
-    entity_index_to_name = {entity.entity_number: entity.entity_name for entity in entities_index_mapping_dto.entities_index_mapping_items}
-    
-    # ownerships_request에서 unique한 기업 인덱스들 추출
-    entity_indices = set()
-    for ownership in ownerships_request.ownerships:
-        entity_indices.add(ownership.owner_entity_index)
-        entity_indices.add(ownership.owned_entity_index)
+# np.allclose의 기본 상대 허용 오차
+ALLCLOSE_RELATIVE_TOLERANCE = 1e-5
+
+# 발산하는 입력(inf/NaN)에서만 실행되는 경로이므로 fastmath(유한값 가정)는 사용하지 않음 (수렴 비교가 정의되지 않게 됨)
+@njit(parallel=True, cache=True)
+def transitive_ownership(owner_indices, owned_indices, percentages, matrix_size, epsilon, max_iterations):
+    """Fixed-point iteration over the ownership edges, each owner row converges independently in parallel"""
+    result_matrix = np.zeros((matrix_size, matrix_size))
+    row_iterations = np.zeros(matrix_size, dtype=np.int64)
+    for owner_index in prange(matrix_size):
+        # 기존 반복(R = D에서 시작)과 반복 횟수가 같도록 owner의 직접 지분에서 시작
+        row = np.zeros(matrix_size)
+        for edge in range(owner_indices.shape[0]):
+            if owner_indices[edge] == owner_index:
+                row[owned_indices[edge]] = percentages[edge]
+        next_row = np.zeros(matrix_size)
+        for iteration in range(max_iterations):
+            next_row[:] = 0.0
+            for edge in range(owner_indices.shape[0]):
+                # owner 자신의 지분은 1로 간주 (owner를 다시 거치는 경로는 제외)
+                via_index = owner_indices[edge]
+                via_ratio = 1.0 if via_index == owner_index else row[via_index]
+                next_row[owned_indices[edge]] += via_ratio * percentages[edge]
+            # 기존 반복의 np.allclose(이전, 현재, atol=epsilon)와 같은 수렴 조건 (NaN은 수렴하지 않은 것으로 봄)
+            is_converged = True
+            for column in range(matrix_size):
+                if not (next_row[column] == row[column] or abs(next_row[column] - row[column]) <= epsilon + ALLCLOSE_RELATIVE_TOLERANCE * abs(next_row[column])):
+                    is_converged = False
+                    break
+            row, next_row = next_row, row
+            row_iterations[owner_index] = iteration + 1
+            if is_converged:
+                break
+        result_matrix[owner_index, :] = row
+    return result_matrix, row_iterations.max()
+
+def iterate_direct_indirect_ownership_matrix(direct_ownership_matrix: np.ndarray, epsilon: float, max_iterations: int = 1000) -> Tuple[np.ndarray, int]:
+    """Calculate the direct and indirect ownership matrix by fixed-point iteration over the nonzero ownerships"""
+    # np.nonzero는 비연속 배열을 반환하므로 연속 배열로 맞춰 JIT 시그니처를 하나로 유지
+    owner_indices, owned_indices = (np.ascontiguousarray(indices) for indices in np.nonzero(direct_ownership_matrix))
+    percentages = direct_ownership_matrix[owner_indices, owned_indices]
+    result_matrix, iterations = transitive_ownership(owner_indices, owned_indices, percentages, direct_ownership_matrix.shape[0], epsilon, max_iterations)
+    return result_matrix, int(iterations)
+
+# 첫 요청에서 JIT 컴파일이 일어나지 않도록 import 시 2x2 행렬로 미리 컴파일 (cache=True이므로 이후 프로세스는 캐시에서 로드)
+iterate_direct_indirect_ownership_matrix(np.array([[0.0, 0.5], [0.0, 0.0]]), 1e-7)
+
+@njit(cache=True)
+def solve_small_direct_indirect_ownership_matrix(direct_ownership_matrix, epsilon):
+    """Closed form of the small ownership matrix by Gauss-Jordan elimination, returns (result matrix, False) when it cannot be used"""
+    matrix_size = direct_ownership_matrix.shape[0]
+    # I - D를 단위 행렬로 소거하면서 같은 연산을 단위 행렬에 적용해 M = (I - D)^-1을 구함
+    reduced_matrix = np.eye(matrix_size) - direct_ownership_matrix
+    total_path_matrix = np.eye(matrix_size)
+    for pivot_column in range(matrix_size):
+        # 부분 피벗팅: 절댓값이 가장 큰 행을 피벗으로 사용
+        pivot_row = pivot_column
+        for row in range(pivot_column + 1, matrix_size):
+            if abs(reduced_matrix[row, pivot_column]) > abs(reduced_matrix[pivot_row, pivot_column]):
+                pivot_row = row
+        if abs(reduced_matrix[pivot_row, pivot_column]) < 1e-12:
+            # I - D가 특이(singular)한 경우
+            return total_path_matrix, False
+        if pivot_row != pivot_column:
+            for column in range(matrix_size):
+                reduced_matrix[pivot_row, column], reduced_matrix[pivot_column, column] = reduced_matrix[pivot_column, column], reduced_matrix[pivot_row, column]
+                total_path_matrix[pivot_row, column], total_path_matrix[pivot_column, column] = total_path_matrix[pivot_column, column], total_path_matrix[pivot_row, column]
+        pivot_inverse = 1.0 / reduced_matrix[pivot_column, pivot_column]
+        for column in range(matrix_size):
+            reduced_matrix[pivot_column, column] *= pivot_inverse
+            total_path_matrix[pivot_column, column] *= pivot_inverse
+        for row in range(matrix_size):
+            factor = reduced_matrix[row, pivot_column]
+            if row != pivot_column and factor != 0.0:
+                for column in range(matrix_size):
+                    reduced_matrix[row, column] -= factor * reduced_matrix[pivot_column, column]
+                    total_path_matrix[row, column] -= factor * total_path_matrix[pivot_column, column]
+
+    # 급수가 수렴하지 않으면(spectral radius >= 1) M에 음수 성분이 생김
+    for row in range(matrix_size):
+        for column in range(matrix_size):
+            if total_path_matrix[row, column] < -epsilon:
+                return total_path_matrix, False
+
+    # R[i][j] = M[i][j] / M[i][i], R[i][i] = 1 - 1 / M[i][i] (결과는 M에 덮어씀)
+    for row in range(matrix_size):
+        diagonal = total_path_matrix[row, row]
+        for column in range(matrix_size):
+            total_path_matrix[row, column] /= diagonal
+        total_path_matrix[row, row] = 1.0 - 1.0 / diagonal
+    return total_path_matrix, True
+
+# 첫 요청에서 JIT 컴파일이 일어나지 않도록 import 시 미리 컴파일
+solve_small_direct_indirect_ownership_matrix(np.array([[0.0, 0.5], [0.0, 0.0]]), 1e-7)
+
+@njit(parallel=True, cache=True)
+def solve_small_direct_indirect_ownership_matrices(packed_matrices, offsets, sizes, epsilon):
+    """Solve independent small ownership matrices packed row-major into one array, each group in parallel"""
+    packed_result_matrices = np.zeros_like(packed_matrices)
+    is_solved = np.zeros(sizes.shape[0], dtype=np.bool_)
+    for group in prange(sizes.shape[0]):
+        start = offsets[group]
+        end = start + sizes[group] * sizes[group]
+        result_matrix, is_solved[group] = solve_small_direct_indirect_ownership_matrix(packed_matrices[start:end].reshape((sizes[group], sizes[group])), epsilon)
+        packed_result_matrices[start:end] = result_matrix.ravel()
+    return packed_result_matrices, is_solved
+
+# 첫 배치 요청에서 JIT 컴파일이 일어나지 않도록 import 시 미리 컴파일
+solve_small_direct_indirect_ownership_matrices(np.array([0.0, 0.5, 0.0, 0.0]), np.array([0], dtype=np.int64), np.array([2], dtype=np.int64), 1e-7)
+
+def solve_direct_indirect_ownership_matrix(direct_ownership_matrix: np.ndarray, epsilon: float) -> Tuple[np.ndarray, int]:
+    """Calculate the direct and indirect ownership matrix in closed form, the number of iterations is 1
+
+    The fixed point of the iteration is R[i][j] = M[i][j] / M[i][i] and R[i][i] = 1 - 1 / M[i][i] where M = (I - D)^-1,
+    i.e. the ownership paths that do not pass through the owner itself again.
+    Falls back to the iteration when I - D is singular or the series does not converge (e.g. 100% cross ownership).
+    """
+    matrix_size = direct_ownership_matrix.shape[0]
+    if matrix_size <= SMALL_MATRIX_MAX_SIZE:
+        result_matrix, is_solved = solve_small_direct_indirect_ownership_matrix(direct_ownership_matrix, epsilon)
+        if is_solved:
+            return result_matrix, 1
+        return iterate_direct_indirect_ownership_matrix(direct_ownership_matrix, epsilon)
+
+    identity_matrix = np.eye(matrix_size)
+    is_sparse = matrix_size >= SPARSE_MIN_MATRIX_SIZE and np.count_nonzero(direct_ownership_matrix) <= SPARSE_MAX_DENSITY * matrix_size ** 2
+    try:
+        # M = I + D + D^2 + ... (모든 소유 경로의 합)
+        if is_sparse:
+            # 희소 행렬은 SuperLU로 분해 후 단위 행렬의 각 열을 풀어 M을 구함
+            lu_factorization = splu(sparse.csc_matrix(identity_matrix - direct_ownership_matrix))
+            total_path_matrix = lu_factorization.solve(identity_matrix)
+        else:
+            # I - D와 우변 단위 행렬은 임시 배열이므로 LAPACK gesv가 제자리에서 덮어쓰도록 함 (입력은 유한값이므로 검사 생략)
+            total_path_matrix = linalg.solve(identity_matrix - direct_ownership_matrix, np.eye(matrix_size), overwrite_a=True, overwrite_b=True, check_finite=False)
+    except (np.linalg.LinAlgError, RuntimeError):
+        # RuntimeError: SuperLU에서 행렬이 특이(singular)한 경우
+        return iterate_direct_indirect_ownership_matrix(direct_ownership_matrix, epsilon)
+
+    # 급수가 수렴하지 않으면(spectral radius >= 1) M에 음수 성분이 생김
+    if (total_path_matrix < -epsilon).any():
+        return iterate_direct_indirect_ownership_matrix(direct_ownership_matrix, epsilon)
+
+    diagonal = np.diag(total_path_matrix)
+    result_matrix = total_path_matrix / diagonal[:, np.newaxis]
+    np.fill_diagonal(result_matrix, 1 - 1 / diagonal)
+    return result_matrix, 1
+
+def build_direct_ownership_matrix(ownerships: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the direct ownership matrix over the entities that appear in the ownerships, returns (entity indices, matrix)"""
+    owner_indices = ownerships["owner_entity_index"]
+    owned_indices = ownerships["owned_entity_index"]
+
+    # ownerships에서 unique한 기업 인덱스들 추출 (정렬된 배열)
+    entity_indices = np.union1d(owner_indices, owned_indices)
     
-    # 최대 엔티티 번호를 찾아서 행렬 크기 결정
-    max_entity_index = max(entity_indices) if entity_indices else 0
-    matrix_size = max_entity_index + 1
+    # ownerships에 등장하는 엔티티만 0..k-1로 압축하여 행렬 크기 결정 (소유 관계가 없는 엔티티의 빈 행/열 제외)
+    matrix_size = entity_indices.size
 
     # direct_ownership_matrix 초기화 (0으로 채워진 정사각 행렬)
-    direct_ownership_matrix = np.zeros((matrix_size, matrix_size), dtype=float)
+    direct_ownership_matrix = np.zeros((matrix_size, matrix_size), dtype=np.float64)
     
-    # ownerships_request의 모든 소유권 관계를 행렬에 채우기
-    for ownership in ownerships_request.ownerships:
-        owner_index = ownership.owner_entity_index
-        owned_index = ownership.owned_entity_index
-        percentage = ownership.ownership_percentage
-        
-        # owner는 행 인덱스, owned는 열 인덱스, percentage는 행렬 성분값
-        direct_ownership_matrix[owner_index][owned_index] = percentage
-    
-    result_matrix = direct_ownership_matrix.copy()
-    max_iterations = 1000
-    iterations = 0
-    while(True):
-        # 이전 단계 결과를 저장
-        previous_matrix = result_matrix.copy()
-        
-        np.fill_diagonal(result_matrix, 1)
-        result_matrix = np.matmul(result_matrix, direct_ownership_matrix)
-        iterations += 1
-        
-        # 이전 단계와 현재 단계 결과를 비교하여 수렴성 판단
-        if iterations >= max_iterations or np.allclose(previous_matrix, result_matrix, atol=epsilon_for_calculation):
-            break
-    result = []
-    for owner_index in entity_indices:
-        for owned_index in entity_indices:
-            direct_indirect_ratio = result_matrix[owner_index][owned_index]
-            
-            # epsilon 기준으로 필터링 (작은 값 제외)
-            if direct_indirect_ratio > epsilon_for_filtering:
-                # 직간접지분 반올림
-                direct_indirect_ratio_processed = round(direct_indirect_ratio, decimal_places)
-                
-                # 인덱스를 이름으로 변환
-                owner_name = entity_index_to_name[owner_index]
-                owned_name = entity_index_to_name[owned_index]
-                
-                result.append(DirectIndirectOwnershipRatioResponseItem(
-                    owner_entity_name=owner_name,
-                    owned_entity_name=owned_name,
-                    direct_indirect_ownership_ratio=direct_indirect_ratio_processed
-                ))
-
-    return DirectIndirectOwnershipRatioResponse(direct_indirect_ownership_ratio_items=result, iterations=iterations)
-
-@router.post("/pillar-two-calculation-structure", response_model=ApiResponse)
-async def calculate_pillar_two_calculation_structure(entities_request: EntitiesRequest, ownerships_request: OwnershipsRequest):
+    # owner는 행 인덱스, owned는 열 인덱스, percentage는 행렬 성분값 (entity_indices가 정렬되어 있으므로 searchsorted로 압축 인덱스를 구함)
+    direct_ownership_matrix[np.searchsorted(entity_indices, owner_indices), np.searchsorted(entity_indices, owned_indices)] = ownerships["ownership_percentage"]
+    return entity_indices, direct_ownership_matrix
+
+def convert_ownership_matrix_to_dto(entities_index_mapping_dto: EntitiesIndexMappingDTO, entity_indices: np.ndarray, result_matrix: np.ndarray, iterations: int) -> DirectIndirectOwnershipRatioStruct:
+    """Convert the direct and indirect ownership matrix over the compacted entity indices to the response"""
+    # 엔티티 인덱스를 이름으로 매핑하는 딕셔너리 (결과에서 이름 표시를 위해, DTO에 한 번만 만들어 재사용)
+    entity_index_to_name = entities_index_mapping_dto.number_to_name
+
+    # epsilon 기준으로 필터링 (작은 값 제외) 후 압축 인덱스를 원래 엔티티 번호로 되돌림
+    result_owner_indices, result_owned_indices = np.nonzero(result_matrix > EPSILON_FOR_FILTERING)
+    ratios = result_matrix[result_owner_indices, result_owned_indices]
+    result_owner_indices = entity_indices[result_owner_indices]
+    result_owned_indices = entity_indices[result_owned_indices]
+
+    # 인덱스를 이름으로 변환하고 직간접지분 반올림 (Python round로 기존과 같은 반올림 결과 유지)
+    result = [
+        DirectIndirectOwnershipRatioItemStruct(
+            owner_entity_name=entity_index_to_name[owner_index],
+            owned_entity_name=entity_index_to_name[owned_index],
+            direct_indirect_ownership_ratio=round(ratio, RATIO_DECIMAL_PLACES)
+        )
+        for owner_index, owned_index, ratio in zip(result_owner_indices.tolist(), result_owned_indices.tolist(), ratios.tolist())
+    ]
+
+    return DirectIndirectOwnershipRatioStruct(direct_indirect_ownership_ratio_items=result, iterations=iterations)
+
+def calculate_direct_indirect_ownership_ratio_core(entities_index_mapping_dto: EntitiesIndexMappingDTO, ownerships: np.ndarray) -> DirectIndirectOwnershipRatioStruct:
+    """Calculate the direct and indirect ownership ratio from the ownership records of OWNERSHIP_DTYPE"""
+    entity_indices, direct_ownership_matrix = build_direct_ownership_matrix(ownerships)
+    result_matrix, iterations = solve_direct_indirect_ownership_matrix(direct_ownership_matrix, EPSILON_FOR_CALCULATION)
+    return convert_ownership_matrix_to_dto(entities_index_mapping_dto, entity_indices, result_matrix, iterations)
+
+def calculate_direct_indirect_ownership_ratio_batch_core(groups: List[Tuple[EntitiesIndexMappingDTO, np.ndarray]]) -> List[DirectIndirectOwnershipRatioStruct]:
+    """Calculate the direct and indirect ownership ratios of independent ownership groups
+
+    Small groups are solved together in one parallel kernel, the others (and the small groups it cannot solve) one by one.
     """
-    Pillar 2 계산 구조 계산
-    
-    모든 법인에 대한 Pillar 2 계산 구조를 계산합니다.
+    built_groups = [build_direct_ownership_matrix(ownerships) for _, ownerships in groups]
+    results: List[Optional[Tuple[np.ndarray, int]]] = [None] * len(groups)
+
+    # 작은 행렬들은 하나의 배열에 이어 붙여 그룹별로 병렬 계산
+    small_groups = [group for group, (_, matrix) in enumerate(built_groups) if matrix.shape[0] <= SMALL_MATRIX_MAX_SIZE]
+    if small_groups:
+        sizes = np.array([built_groups[group][1].shape[0] for group in small_groups], dtype=np.int64)
+        offsets = np.zeros(len(small_groups), dtype=np.int64)
+        np.cumsum(sizes[:-1] ** 2, out=offsets[1:])
+        packed_matrices = np.concatenate([built_groups[group][1].ravel() for group in small_groups])
+        packed_result_matrices, is_solved = solve_small_direct_indirect_ownership_matrices(packed_matrices, offsets, sizes, EPSILON_FOR_CALCULATION)
+        for group, offset, size, solved in zip(small_groups, offsets.tolist(), sizes.tolist(), is_solved.tolist()):
+            if solved:
+                results[group] = (packed_result_matrices[offset:offset + size * size].reshape(size, size), 1)
+
+    # 큰 행렬과 병렬 커널에서 풀지 못한 행렬은 단일 계산과 같은 경로로 계산
+    for group, (_, direct_ownership_matrix) in enumerate(built_groups):
+        if results[group] is None:
+            results[group] = solve_direct_indirect_ownership_matrix(direct_ownership_matrix, EPSILON_FOR_CALCULATION)
+
+    return [
+        convert_ownership_matrix_to_dto(entities_index_mapping_dto, entity_indices, result_matrix, iterations)
+        for (entities_index_mapping_dto, _), (entity_indices, _), (result_matrix, iterations) in zip(groups, built_groups, results)
+    ]
+
+async def calculate_direct_indirect_ownership_ratio_async(entities_index_mapping_dto: EntitiesIndexMappingDTO, ownerships: np.ndarray) -> DirectIndirectOwnershipRatioStruct:
+    """Calculate the direct and indirect ownership ratio, large ownership graphs are calculated in a worker thread"""
+    if len(ownerships) < THREAD_OFFLOAD_MIN_OWNERSHIPS:
+        return calculate_direct_indirect_ownership_ratio_core(entities_index_mapping_dto, ownerships)
+    return await asyncio.to_thread(calculate_direct_indirect_ownership_ratio_core, entities_index_mapping_dto, ownerships)
+
+async def calculate_direct_indirect_ownership_ratio_batch_async(groups: List[Tuple[EntitiesIndexMappingDTO, np.ndarray]]) -> List[DirectIndirectOwnershipRatioStruct]:
+    """Calculate the direct and indirect ownership ratios of the groups, large batches are calculated in a worker thread"""
+    if sum(len(ownerships) for _, ownerships in groups) < THREAD_OFFLOAD_MIN_OWNERSHIPS:
+        return calculate_direct_indirect_ownership_ratio_batch_core(groups)
+    return await asyncio.to_thread(calculate_direct_indirect_ownership_ratio_batch_core, groups)
+
+def create_structure_ownership_group(structure_request: PillarTwoCalculationStructureRequest) -> Tuple[EntitiesIndexMappingDTO, np.ndarray]:
+    """Create the entities index mapping dto and the ownership records of the pillar 2 calculation structure request"""
+    entities_index_mapping_dto = create_entities_index_mapping_dto(structure_request.entities_request)
+    return entities_index_mapping_dto, convert_ownerships_to_array(entities_index_mapping_dto, structure_request.ownerships_request)
+
+async def cached_calculation_response(request: Request, adapter: TypeAdapter, prepare: Callable[[Any], Any], calculate: Callable[[Any], Awaitable[ApiResponseStruct]]) -> Response:
+    """Serve the response from the response cache, or validate the body with the adapter, calculate and cache the encoded response
+
+    prepare converts the validated request into the arrays used by calculate, so the request objects are released before the calculation.
     """
-    try:
-        entities_index_mapping_dto = create_entities_index_mapping_dto(entities_request)
+    body = await request.body()
+    cache_key = response_cache.make_key(request.url.path, body)
+    cached_content = response_cache.get(cache_key)
+    if cached_content is not None:
+        return Response(content=cached_content, media_type="application/json", headers={"X-Cache": "HIT"})
 
-        ownerships_request_dto = convert_ownerships_to_dto(entities_index_mapping_dto, ownerships_request)
-        direct_indirect_ownership_ratio_dto = calculate_direct_indirect_ownership_ratio_core(entities_index_mapping_dto, ownerships_request_dto)
-        return ApiResponse(data=StructuresResponse(companies=CompaniesResponse(companies=[]), income_inclusion_rules=IncomeInclusionRulesResponse(income_inclusion_rules=[]), under_taxed_payments_rules=UnderTaxedPaymentsRulesResponse(under_taxed_payments_rules=[]), org_charts=OrgChartsResponse(org_charts=[])))
+    try:
+        # 검증된 요청 객체는 prepare 안에서만 참조되므로 계산 전에 해제됨
+        prepared = prepare(parse_request_body(body, adapter))
+        api_response = await calculate(prepared)
+        # msgspec으로 바로 직렬화 (response_model은 API 문서용)
+        content = JSON_ENCODER.encode(api_response)
+    except RequestValidationError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"계산 중 오류가 발생했습니다: {str(e)}")
+    response_cache.set(cache_key, content)
+    return Response(content=content, media_type="application/json", headers={"X-Cache": "MISS"})
+
+async def calculate_pillar_two_calculation_structure_response(group: Tuple[EntitiesIndexMappingDTO, np.ndarray]) -> ApiResponseStruct:
+    """Calculate the pillar 2 calculation structure response"""
+    direct_indirect_ownership_ratio_dto = await calculate_direct_indirect_ownership_ratio_async(*group)
+    structures_response = StructuresStruct(
+        companies=CompaniesStruct(companies=[]),
+        income_inclusion_rules=IncomeInclusionRulesStruct(income_inclusion_rules=[]),
+        under_taxed_payments_rules=UnderTaxedPaymentsRulesStruct(under_taxed_payments_rules=[]),
+        org_charts=OrgChartsStruct(org_charts=[])
+    )
+    return ApiResponseStruct(data=structures_response)
+
+async def calculate_direct_indirect_ownership_ratio_response(group: Tuple[EntitiesIndexMappingDTO, np.ndarray]) -> ApiResponseStruct:
+    """Calculate the direct and indirect ownership ratio response"""
+    direct_indirect_ownership_ratio_dto = await calculate_direct_indirect_ownership_ratio_async(*group)
+    return ApiResponseStruct(data=direct_indirect_ownership_ratio_dto, success=True, message="직간접 지분 비율 계산이 성공적으로 완료되었습니다")
+
+async def calculate_direct_indirect_ownership_ratio_batch_response(groups: List[Tuple[EntitiesIndexMappingDTO, np.ndarray]]) -> ApiResponseStruct:
+    """Calculate the direct and indirect ownership ratios response of the ownership groups"""
+    direct_indirect_ownership_ratio_dtos = await calculate_direct_indirect_ownership_ratio_batch_async(groups)
+    return ApiResponseStruct(
+        data=DirectIndirectOwnershipRatiosStruct(direct_indirect_ownership_ratios=direct_indirect_ownership_ratio_dtos),
+        success=True,
+        message="직간접 지분 비율 일괄 계산이 성공적으로 완료되었습니다"
+    )
+
+def create_simple_ownership_groups(ownerships_requests: List[OwnershipsRequest]) -> List[Tuple[EntitiesIndexMappingDTO, np.ndarray]]:
+    """Create the entities index mapping dto and the ownership records of each ownership group"""
+    return [create_simple_ownership_group(ownerships_request) for ownerships_request in ownerships_requests]
 
-@router.post("/pillar-two-calculation-structure/direct-indirect-ownership-ratio", response_model=ApiResponse)
-async def calculate_direct_indirect_ownership_ratio(ownerships_request: OwnershipsRequest):
+@router.post("/pillar-two-calculation-structure", response_model=StructuresApiResponse, openapi_extra=request_body_openapi(PILLAR_TWO_CALCULATION_STRUCTURE_ADAPTER))
+async def calculate_pillar_two_calculation_structure(request: Request):
+    """
+    Pillar 2 계산 구조 계산
+    
+    모든 법인에 대한 Pillar 2 계산 구조를 계산합니다.
+    """
+    return await cached_calculation_response(request, PILLAR_TWO_CALCULATION_STRUCTURE_ADAPTER, create_structure_ownership_group, calculate_pillar_two_calculation_structure_response)
+
+@router.post("/pillar-two-calculation-structure/direct-indirect-ownership-ratio", response_model=DirectIndirectOwnershipRatioApiResponse, openapi_extra=request_body_openapi(OWNERSHIPS_ADAPTER))
+async def calculate_direct_indirect_ownership_ratio(request: Request):
     """
     모든 법인에 대한 직간접 지분 비율을 계산합니다.
     """
-    try:
-        entities_index_mapping_dto = create_entities_simple_index_mapping_dto(ownerships_request)
-        ownerships_request_dto = convert_ownerships_to_dto(entities_index_mapping_dto, ownerships_request)
-        direct_indirect_ownership_ratio_dto = calculate_direct_indirect_ownership_ratio_core(entities_index_mapping_dto, ownerships_request_dto)
-        return ApiResponse(data=direct_indirect_ownership_ratio_dto, iterations=direct_indirect_ownership_ratio_dto.iterations, success=True, message="직간접 지분 비율 계산이 성공적으로 완료되었습니다")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"계산 중 오류가 발생했습니다: {str(e)}")
\ No newline at end of file
+    return await cached_calculation_response(request, OWNERSHIPS_ADAPTER, create_simple_ownership_group, calculate_direct_indirect_ownership_ratio_response)
+
+@router.post("/pillar-two-calculation-structure/batch", response_model=DirectIndirectOwnershipRatiosApiResponse, openapi_extra=request_body_openapi(OWNERSHIPS_BATCH_ADAPTER))
+async def calculate_direct_indirect_ownership_ratio_batch(request: Request):
+    """
+    여러 소유 관계 그룹의 직간접 지분 비율을 한 번에 계산합니다.
+
+    그룹은 서로 독립적으로 계산되며, 결과는 요청한 그룹 순서대로 반환합니다.
+    """
+    return await cached_calculation_response(request, OWNERSHIPS_BATCH_ADAPTER, create_simple_ownership_groups, calculate_direct_indirect_ownership_ratio_batch_response)
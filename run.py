@@ -3,19 +3,35 @@
 OECD Pillar2 FastAPI 서버 실행 스크립트
 """
 
+import os
 import uvicorn
 from app.config import settings
 
 if __name__ == "__main__":
     print(f"🚀 OECD Pillar2 API 서버를 시작합니다...")
     print(f"📍 서버 주소: http://{settings.API_HOST}:{settings.API_PORT}")
-    print(f"📚 API 문서: http://{settings.API_HOST}:{settings.API_PORT}/docs")
+    if settings.DEBUG:
+        print(f"📚 API 문서: http://{settings.API_HOST}:{settings.API_PORT}/docs")
+    else:
+        print("📚 API 문서: 비활성화 (DEBUG=False)")
     print(f"🔧 디버그 모드: {settings.DEBUG}")
     
+    # reload와 다중 worker는 함께 사용할 수 없으므로 디버그 모드에서는 worker 1개
+    workers = 1 if settings.DEBUG else settings.UVICORN_WORKERS
+    if workers > 1:
+        # worker마다 Numba 병렬 커널과 BLAS/LAPACK 스레드 풀을 가지므로 코어를 worker 수로 나눠 과다 구독 방지
+        # (numpy/numba를 import하는 worker 프로세스가 생성되기 전에 설정, 이미 지정된 환경변수는 그대로 사용)
+        threads_per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+        for name in ("NUMBA_NUM_THREADS", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(name, threads_per_worker)
+
     uvicorn.run(
         "app.api:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        workers=workers,
+        loop=settings.UVICORN_LOOP,
+        http=settings.UVICORN_HTTP,
         log_level="info"
     ) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+import pytest
+
+from app.basic_structure_model import IncomeInclusionRuleResponse
+from app.fast_models import JSON_ENCODER, IncomeInclusionRuleStruct
+
+
+def test_income_inclusion_rule_offset_ratio_is_derived():
+    income_inclusion_rule = IncomeInclusionRuleStruct.create("parent", ["owned"], direct_indirect_ownership_ratio=0.8, income_inclusion_ratio=0.3)
+
+    assert income_inclusion_rule.offset_ratio == 0.8 - 0.3
+    # pydantic 응답 모델(OpenAPI 문서)과 같은 JSON을 만듦
+    assert JSON_ENCODER.encode(income_inclusion_rule) == IncomeInclusionRuleResponse(
+        parent_entity_name="parent", owned_entity_names=["owned"], direct_indirect_ownership_ratio=0.8, income_inclusion_ratio=0.3
+    ).model_dump_json().encode()
+
+
+def test_income_inclusion_rule_rejects_inconsistent_offset_ratio():
+    with pytest.raises(ValueError):
+        IncomeInclusionRuleStruct(parent_entity_name="parent", owned_entity_names=["owned"], direct_indirect_ownership_ratio=0.8, income_inclusion_ratio=0.3, offset_ratio=0.9)
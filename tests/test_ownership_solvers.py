@@ -0,0 +1,148 @@
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from app.routers import calculations
+from app.routers.calculations import (
+    EPSILON_FOR_CALCULATION,
+    SMALL_MATRIX_MAX_SIZE,
+    SPARSE_MIN_MATRIX_SIZE,
+    iterate_direct_indirect_ownership_matrix,
+    solve_direct_indirect_ownership_matrix,
+    solve_small_direct_indirect_ownership_matrices,
+)
+
+
+def reference_ownership_matrix(direct_ownership_matrix: np.ndarray, tolerance: float = 1e-15, max_iterations: int = 10000) -> np.ndarray:
+    """Original fixed-point iteration: reset the diagonal to 1 and multiply by D until it stops changing"""
+    result_matrix = direct_ownership_matrix.copy()
+    for _ in range(max_iterations):
+        previous_matrix = result_matrix.copy()
+        np.fill_diagonal(result_matrix, 1)
+        result_matrix = result_matrix @ direct_ownership_matrix
+        if np.abs(result_matrix - previous_matrix).max() < tolerance:
+            break
+    return result_matrix
+
+
+def reference_iteration(direct_ownership_matrix: np.ndarray, epsilon: float, max_iterations: int = 1000) -> Tuple[np.ndarray, int]:
+    """Original endpoint loop, returns the result matrix and the reported number of iterations"""
+    result_matrix = direct_ownership_matrix.copy()
+    iterations = 0
+    while True:
+        previous_matrix = result_matrix.copy()
+        np.fill_diagonal(result_matrix, 1)
+        result_matrix = result_matrix @ direct_ownership_matrix
+        iterations += 1
+        if iterations >= max_iterations or np.allclose(previous_matrix, result_matrix, atol=epsilon):
+            return result_matrix, iterations
+
+
+def random_ownership_matrix(rng: np.random.Generator, matrix_size: int, density: float, max_total_ownership: float = 0.9) -> np.ndarray:
+    """Random ownership graph whose total ownership of each entity is at most max_total_ownership (convergent series)"""
+    direct_ownership_matrix = np.where(rng.random((matrix_size, matrix_size)) < density, rng.random((matrix_size, matrix_size)), 0.0)
+    np.fill_diagonal(direct_ownership_matrix, 0)
+    column_sums = direct_ownership_matrix.sum(axis=0)
+    return direct_ownership_matrix * (max_total_ownership / np.maximum(column_sums, max_total_ownership))
+
+
+@pytest.fixture
+def solver_calls(monkeypatch):
+    """Record which closed-form solver each call of solve_direct_indirect_ownership_matrix used"""
+    calls = []
+    small_solver = calculations.solve_small_direct_indirect_ownership_matrix
+    sparse_solver = calculations.splu
+
+    def record_small(*args):
+        calls.append("small")
+        return small_solver(*args)
+
+    def record_sparse(*args):
+        calls.append("sparse")
+        return sparse_solver(*args)
+
+    monkeypatch.setattr(calculations, "solve_small_direct_indirect_ownership_matrix", record_small)
+    monkeypatch.setattr(calculations, "splu", record_sparse)
+    return calls
+
+
+@pytest.mark.parametrize("matrix_size, density, expected_solver", [
+    (2, 0.5, "small"),
+    (7, 0.3, "small"),
+    (SMALL_MATRIX_MAX_SIZE, 0.1, "small"),
+    (SMALL_MATRIX_MAX_SIZE + 1, 0.1, "dense"),
+    (120, 0.05, "dense"),
+    (SPARSE_MIN_MATRIX_SIZE + 100, 0.01, "sparse"),
+])
+def test_closed_form_matches_reference(solver_calls, matrix_size, density, expected_solver):
+    rng = np.random.default_rng(matrix_size)
+    direct_ownership_matrix = random_ownership_matrix(rng, matrix_size, density)
+
+    result_matrix, iterations = solve_direct_indirect_ownership_matrix(direct_ownership_matrix.copy(), EPSILON_FOR_CALCULATION)
+
+    assert solver_calls == ([expected_solver] if expected_solver != "dense" else [])
+    assert iterations == 1
+    np.testing.assert_allclose(result_matrix, reference_ownership_matrix(direct_ownership_matrix), rtol=0, atol=1e-9)
+
+
+def test_batch_kernel_matches_reference():
+    rng = np.random.default_rng(0)
+    direct_ownership_matrices = [random_ownership_matrix(rng, matrix_size, 0.3) for matrix_size in (2, 5, 11, SMALL_MATRIX_MAX_SIZE)]
+    # 100% 상호 보유 그룹은 배치 커널에서 풀지 않고 호출자에게 알림
+    singular_matrix = np.zeros((3, 3))
+    singular_matrix[0, 1] = singular_matrix[1, 0] = 1.0
+    direct_ownership_matrices.append(singular_matrix)
+
+    sizes = np.array([matrix.shape[0] for matrix in direct_ownership_matrices], dtype=np.int64)
+    offsets = np.zeros(sizes.size, dtype=np.int64)
+    np.cumsum(sizes[:-1] ** 2, out=offsets[1:])
+    packed_matrices = np.concatenate([matrix.ravel() for matrix in direct_ownership_matrices])
+
+    packed_result_matrices, is_solved = solve_small_direct_indirect_ownership_matrices(packed_matrices, offsets, sizes, EPSILON_FOR_CALCULATION)
+
+    assert is_solved.tolist() == [True, True, True, True, False]
+    for matrix, offset, size in zip(direct_ownership_matrices[:-1], offsets.tolist(), sizes.tolist()):
+        result_matrix = packed_result_matrices[offset:offset + size * size].reshape(size, size)
+        np.testing.assert_allclose(result_matrix, reference_ownership_matrix(matrix), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("matrix_size", [4, SMALL_MATRIX_MAX_SIZE + 8])
+def test_singular_matrix_falls_back_to_iteration(matrix_size):
+    rng = np.random.default_rng(matrix_size)
+    direct_ownership_matrix = random_ownership_matrix(rng, matrix_size, 0.2)
+    # 0과 1이 서로 100% 보유하면 I - D가 특이 행렬이 됨
+    direct_ownership_matrix[:, :2] = 0
+    direct_ownership_matrix[0, 1] = direct_ownership_matrix[1, 0] = 1.0
+
+    result_matrix, iterations = solve_direct_indirect_ownership_matrix(direct_ownership_matrix.copy(), EPSILON_FOR_CALCULATION)
+    expected_matrix, expected_iterations = reference_iteration(direct_ownership_matrix, EPSILON_FOR_CALCULATION)
+
+    assert iterations == expected_iterations > 1
+    # 행마다 따로 수렴을 멈추므로 기존 반복과는 np.allclose 수렴 조건(상대 오차 1e-5) 범위에서 일치
+    np.testing.assert_allclose(result_matrix, expected_matrix, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("matrix_size", [3, SMALL_MATRIX_MAX_SIZE + 8])
+def test_divergent_matrix_falls_back_to_iteration(matrix_size):
+    direct_ownership_matrix = np.zeros((matrix_size, matrix_size))
+    # 1번 법인의 총 보유 지분이 200%라서 급수가 발산
+    direct_ownership_matrix[0, 1] = direct_ownership_matrix[1, 0] = 1.0
+    direct_ownership_matrix[0, 2] = direct_ownership_matrix[2, 1] = 1.0
+
+    result_matrix, iterations = solve_direct_indirect_ownership_matrix(direct_ownership_matrix.copy(), EPSILON_FOR_CALCULATION)
+    expected_matrix, expected_iterations = reference_iteration(direct_ownership_matrix, EPSILON_FOR_CALCULATION)
+
+    assert iterations == expected_iterations > 1
+    np.testing.assert_array_equal(result_matrix, expected_matrix)
+
+
+@pytest.mark.parametrize("direct_ownership_matrix, expected_iterations", [
+    (np.array([[0.0, 1.0], [1.0, 0.0]]), 2),
+    (np.array([[0.0, 0.5, 0.0, 0.0], [0.0, 0.0, 0.5, 0.0], [0.0, 0.0, 0.0, 0.5], [0.0, 0.0, 0.0, 0.0]]), 3),
+    (np.zeros((3, 3)), 1),
+])
+def test_iteration_count_matches_reference(direct_ownership_matrix, expected_iterations):
+    _, iterations = iterate_direct_indirect_ownership_matrix(direct_ownership_matrix.copy(), EPSILON_FOR_CALCULATION)
+
+    assert iterations == reference_iteration(direct_ownership_matrix, EPSILON_FOR_CALCULATION)[1] == expected_iterations
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+import pytest
+
+from app.precise_models import DEFAULT_MIN_TAX_RATE, PreciseEntity, PrecisionCalculator
+
+
+def precise_entity(profit: str, tax_paid: str) -> PreciseEntity:
+    return PreciseEntity(name="entity", country="KR", entity_type="subsidiary", revenue="0", profit=profit, tax_paid=tax_paid, employees=0)
+
+
+@pytest.mark.parametrize("minimum_rate", [DEFAULT_MIN_TAX_RATE, Decimal("0.2")])
+def test_batch_matches_decimal_methods(minimum_rate):
+    entities = [
+        precise_entity("1000000", "149999.99999"),  # 반올림한 유효세율이 최소세율과 같아지는 경계
+        precise_entity("1000000", "149999.9"),
+        precise_entity("1000000", "150000"),
+        precise_entity("1000000", "200000"),
+        precise_entity("123456.789", "0"),
+        precise_entity("0", "100"),
+        precise_entity("-5000", "100"),
+        precise_entity("987654321.123", "98765432.1"),
+    ]
+
+    effective_tax_rates, additional_taxes = PrecisionCalculator.calculate_batch(entities, minimum_rate)
+
+    assert PrecisionCalculator.to_quantized_decimals(effective_tax_rates) == [
+        PrecisionCalculator.calculate_effective_tax_rate_decimal(entity) for entity in entities
+    ]
+    expected_additional_taxes = [PrecisionCalculator.calculate_additional_tax_decimal(entity, minimum_rate) for entity in entities]
+    # 추가 납부 여부는 정확히 일치해야 하고, 금액은 float64 정밀도(뺄셈 상쇄로 인한 절대 오차) 안에서 일치
+    assert [additional_tax > 0 for additional_tax in additional_taxes] == [additional_tax > 0 for additional_tax in expected_additional_taxes]
+    assert additional_taxes.tolist() == pytest.approx([float(additional_tax) for additional_tax in expected_additional_taxes], rel=0, abs=1e-6)